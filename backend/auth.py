@@ -73,7 +73,7 @@ async def get_current_admin(credentials: HTTPAuthorizationCredentials = Depends(
 
 async def get_current_admin_with_permissions(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """Dependency to get current authenticated admin with full permissions from database."""
-    from db_models import Admin
+    from cache import get_admin_cached
     
     token = credentials.credentials
     payload = verify_token(token)
@@ -91,8 +91,8 @@ async def get_current_admin_with_permissions(credentials: HTTPAuthorizationCrede
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Get admin from database
-    admin = await Admin.find_one({"username": username})
+    # Get admin from cache or database
+    admin = await get_admin_cached(username)
     if not admin:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -0,0 +1,85 @@
+"""In-process TTL caches for rarely-changing documents."""
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from db_models import Admin, Application
+
+
+class TTLCache:
+    """Small in-memory cache whose entries expire a fixed number of seconds after being set."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if missing or expired."""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            return default
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the oldest entry when the cache is full."""
+        if key not in self._data and len(self._data) >= self.maxsize:
+            self._data.pop(next(iter(self._data)))
+        self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key: Hashable) -> None:
+        """Remove key from the cache if present."""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        self._data.clear()
+
+
+# Applications change rarely; a minute of staleness is acceptable for name/existence lookups
+_application_cache = TTLCache(maxsize=1024, ttl=60)
+
+# Admins are loaded on every authenticated request; keep the window short since it carries permissions
+_admin_cache = TTLCache(maxsize=512, ttl=30)
+
+
+async def get_application_cached(app_id: Any) -> Optional[Application]:
+    """Get an application by ID, served from the in-process cache when possible.
+
+    The returned document is shared between requests and must be treated as read-only.
+    Fetch it with Application.get() instead when it is going to be modified.
+    """
+    key = str(app_id)
+    application = _application_cache.get(key)
+    if application is None:
+        application = await Application.get(app_id)
+        if application:
+            _application_cache.set(key, application)
+    return application
+
+
+def invalidate_application(app_id: Any) -> None:
+    """Drop a cached application after it has been updated or deleted."""
+    _application_cache.pop(str(app_id))
+
+
+async def get_admin_cached(username: str) -> Optional[Admin]:
+    """Get an admin by username, served from the in-process cache when possible.
+    
+    The returned document is shared between requests and must be treated as read-only.
+    Write changes with an update query instead, then call invalidate_admin().
+    """
+    admin = _admin_cache.get(username)
+    if admin is None:
+        admin = await Admin.find_one({"username": username})
+        if admin:
+            _admin_cache.set(username, admin)
+    return admin
+
+
+def invalidate_admin(username: str) -> None:
+    """Drop a cached admin after it has been updated or deleted."""
+    _admin_cache.pop(username)
@@ -1,24 +1,57 @@
 """MongoDB database connection setup using Motor and Beanie ODM."""
 import os
+import atexit
+import asyncio
+from typing import Dict, Tuple
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
-from dotenv import load_dotenv
+from env_cache import load_env_once
 
-load_dotenv()
+load_env_once()
 
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://127.0.0.1:27017/push_db")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "push_db")
 
+# Wire compression for MongoDB traffic. zlib needs no extra packages; "zstd" or "snappy"
+# can be listed first when the zstandard / python-snappy packages are installed.
+MONGODB_COMPRESSORS = os.getenv("MONGODB_COMPRESSORS", "zlib")
+
+# Shared clients keyed by (URI, event loop); a Motor client only works on the loop it was first used on
+_clients: Dict[Tuple[str, asyncio.AbstractEventLoop], AsyncIOMotorClient] = {}
+
+
+def get_client() -> AsyncIOMotorClient:
+    """Return the shared MongoDB client for the running event loop, creating it on first use."""
+    key = (MONGODB_URI, asyncio.get_running_loop())
+    client = _clients.get(key)
+    if client is None:
+        # Add connection timeout parameters
+        client = AsyncIOMotorClient(
+            MONGODB_URI,
+            serverSelectionTimeoutMS=10000,  # 10 seconds
+            connectTimeoutMS=10000,
+            maxPoolSize=100,
+            minPoolSize=5,  # Keep a few connections warm
+            compressors=MONGODB_COMPRESSORS,
+            retryWrites=True
+        )
+        _clients[key] = client
+    return client
+
+
+def close_clients():
+    """Close all shared MongoDB clients."""
+    for client in _clients.values():
+        client.close()
+    _clients.clear()
+
+
+atexit.register(close_clients)
+
 
 async def init_database(document_models=None):
     """Initialize MongoDB connection and Beanie ODM."""
     if document_models is None:
         document_models = []
-    # Add connection timeout parameters
-    client = AsyncIOMotorClient(
-        MONGODB_URI,
-        serverSelectionTimeoutMS=10000,  # 10 seconds
-        connectTimeoutMS=10000
-    )
+    client = get_client()
     await init_beanie(database=client[DATABASE_NAME], document_models=document_models)
-
@@ -1,8 +1,9 @@
 """Database models for push subscription storage."""
 from datetime import datetime
 from typing import Optional, List
-from beanie import Document
-from pydantic import Field
+from beanie import Document, PydanticObjectId
+from pydantic import BaseModel, Field
+from pymongo import IndexModel
 
 
 class Admin(Document):
@@ -38,10 +39,34 @@ class PushSubscription(Document):
     endpoint: str
     keys: dict  # Contains p256dh and auth keys
     user_id: Optional[str] = None
-    application_id: Optional[str] = None  # Link to Application
+    application_id: Optional[PydanticObjectId] = None  # Link to Application (stored as ObjectId)
     created_at: datetime = datetime.utcnow()
     
     class Settings:
         name = "push_subscriptions"
-        indexes = ["endpoint", "user_id", "application_id"]
+        indexes = [
+            "endpoint",
+            "user_id",
+            # Serves application_id lookups and per-application user_id prefix searches
+            IndexModel([("application_id", 1), ("user_id", 1)]),
+            # Serve newest-first user listings, per application and overall
+            IndexModel([("application_id", 1), ("created_at", -1)]),
+            IndexModel([("created_at", -1)]),
+        ]
 
+
+class PushSubscriptionTarget(BaseModel):
+    """Projection of PushSubscription with only the fields needed to deliver a push."""
+    
+    endpoint: str
+    keys: dict
+
+
+class PushSubscriptionListView(BaseModel):
+    """Projection of PushSubscription for user listings, without the subscription keys."""
+    
+    id: PydanticObjectId = Field(alias="_id")
+    endpoint: str
+    user_id: Optional[str] = None
+    application_id: Optional[PydanticObjectId] = None
+    created_at: datetime
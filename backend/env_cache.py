@@ -0,0 +1,39 @@
+"""Load the .env file into the environment, parsing it only when it has changed."""
+import os
+import functools
+from typing import Dict, Optional
+from dotenv import dotenv_values, find_dotenv
+
+
+@functools.lru_cache(maxsize=8)
+def _read_env_file(path: str, mtime_ns: int, size: int) -> Dict[str, Optional[str]]:
+    """Parse a .env file; cached per path and file version (mtime and size)."""
+    return dotenv_values(path)
+
+
+def load_env_once(path: Optional[str] = None, override: bool = False) -> bool:
+    """Load variables from a .env file into os.environ.
+    
+    Drop-in replacement for dotenv.load_dotenv(): the parsed file is cached, so
+    repeated calls only stat the file until it is modified.
+    
+    Args:
+        path: Path to the .env file (defaults to the nearest .env found from this directory upwards)
+        override: Whether values from the file replace variables that are already set
+        
+    Returns:
+        True if a .env file was found and loaded, False otherwise
+    """
+    path = path or find_dotenv()
+    if not path or not os.path.isfile(path):
+        return False
+    
+    stat = os.stat(path)
+    for key, value in _read_env_file(path, stat.st_mtime_ns, stat.st_size).items():
+        if value is None:
+            continue
+        if override:
+            os.environ[key] = value
+        else:
+            os.environ.setdefault(key, value)
+    return True
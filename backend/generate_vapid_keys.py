@@ -54,6 +54,11 @@ def generate_vapid_keys() -> Tuple[Optional[str], Optional[str]]:
         return None, None
 
 
+def decode_vapid_key(key: str) -> bytes:
+    """Decode an unpadded base64 URL-safe VAPID key, adding exactly the padding it needs."""
+    return base64.urlsafe_b64decode(key + "=" * (-len(key) % 4))
+
+
 def validate_vapid_keys(public_key: Optional[str], private_key: Optional[str]) -> bool:
     """Validate VAPID keys format.
     
@@ -69,8 +74,8 @@ def validate_vapid_keys(public_key: Optional[str], private_key: Optional[str]) -
     
     try:
         # Decode and check key lengths
-        public_key_bytes = base64.urlsafe_b64decode(public_key + '==')
-        private_key_bytes = base64.urlsafe_b64decode(private_key + '==')
+        public_key_bytes = decode_vapid_key(public_key)
+        private_key_bytes = decode_vapid_key(private_key)
         
         # Public key should be 64 bytes (x + y coordinates)
         # Private key should be 32 bytes
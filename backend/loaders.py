@@ -0,0 +1,65 @@
+"""Batched loaders that coalesce concurrent lookups into a single MongoDB query."""
+import asyncio
+from typing import Dict, List, Optional, Set
+
+from db_models import PushSubscription
+
+
+class SubscriptionLoader:
+    """Load push subscriptions by user_id, batching lookups made in the same event-loop tick.
+
+    Every load() issued before the loop gets back to its scheduled callbacks is answered by one
+    `{"user_id": {"$in": [...]}}` query instead of one find_one() per caller.
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, List[asyncio.Future]] = {}
+        self._dispatch_scheduled = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    def load(self, user_id: str) -> "asyncio.Future[Optional[PushSubscription]]":
+        """Return a future resolving to the first subscription for user_id, or None."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(user_id, []).append(future)
+        if not self._dispatch_scheduled:
+            self._dispatch_scheduled = True
+            loop.call_soon(self._start_dispatch)
+        return future
+
+    def _start_dispatch(self) -> None:
+        task = asyncio.ensure_future(self._dispatch())
+        # Keep a reference so the task is not garbage collected while running
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self) -> None:
+        batch, self._pending = self._pending, {}
+        self._dispatch_scheduled = False
+
+        try:
+            subscriptions = await PushSubscription.find({"user_id": {"$in": list(batch)}}).to_list()
+        except Exception as e:
+            for futures in batch.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        # Keep the first match per user, mirroring find_one()
+        by_user_id: Dict[str, PushSubscription] = {}
+        for subscription in subscriptions:
+            by_user_id.setdefault(subscription.user_id, subscription)
+
+        for user_id, futures in batch.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(by_user_id.get(user_id))
+
+
+_subscription_loader = SubscriptionLoader()
+
+
+def get_subscription_loader() -> SubscriptionLoader:
+    """Dependency returning the process-wide subscription loader."""
+    return _subscription_loader
@@ -1,14 +1,26 @@
 """FastAPI application for Web Push Notification service."""
+import os
+import re
+import asyncio
 import logging
-from fastapi import FastAPI, HTTPException, Depends, Query, APIRouter
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import FastAPI, HTTPException, Depends, Query, APIRouter, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional, Dict, List
 from datetime import datetime
-from database import init_database
-from db_models import PushSubscription, Admin, Application
-from push_service import send_push_notification, get_vapid_public_key
+from beanie import PydanticObjectId, UpdateResponse
+from database import init_database, get_client
+from db_models import (
+    PushSubscription, PushSubscriptionTarget, PushSubscriptionListView, Admin, Application
+)
+from push_service import (
+    send_push_notification, send_push_batch, send_push_stream,
+    get_vapid_public_key, reset_vapid_reload, vapid_keys_valid, close_http_client
+)
 from generate_vapid_keys import ensure_vapid_keys
 from auth import (
     verify_password, get_password_hash, create_access_token,
@@ -16,9 +28,101 @@ from auth import (
     verify_application_secret
 )
 from app_secret import generate_application_secret, hash_application_secret
+from cache import get_application_cached, invalidate_application, invalidate_admin
+from loaders import SubscriptionLoader, get_subscription_loader
 
 logger = logging.getLogger(__name__)
 
+# Dedicated threads for bcrypt, so password hashing neither blocks the event loop
+# nor competes with other work for the default executor
+_AUTH_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="auth")
+
+
+async def _verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the auth thread pool."""
+    return await asyncio.get_running_loop().run_in_executor(
+        _AUTH_POOL, verify_password, plain_password, hashed_password
+    )
+
+
+async def _hash_password_async(password: str) -> str:
+    """Hash a password on the auth thread pool."""
+    return await asyncio.get_running_loop().run_in_executor(_AUTH_POOL, get_password_hash, password)
+
+# Cheap shape check so obviously malformed dates are rejected without raising
+_ISO_DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def _parse_iso_date(value: str) -> Optional[datetime]:
+    """Parse an ISO 8601 date/datetime query parameter, returning None if it is invalid.
+    
+    Python 3.11's datetime.fromisoformat accepts the "Z" suffix directly.
+    """
+    if not _ISO_DATE_RE.match(value):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _admin_application_object_ids(admin) -> List[PydanticObjectId]:
+    """Convert an admin's assigned application IDs to ObjectIds for subscription queries."""
+    return [PydanticObjectId(app_id) for app_id in admin.application_ids]
+
+
+async def _find_missing_application_ids(app_ids: List[str]) -> List[str]:
+    """Return the application IDs from app_ids that do not exist, using a single query."""
+    object_ids = [PydanticObjectId(app_id) for app_id in app_ids if PydanticObjectId.is_valid(app_id)]
+    found_ids = set()
+    if object_ids:
+        found = await Application.find({"_id": {"$in": object_ids}}).to_list()
+        found_ids = {str(app.id) for app in found}
+    return [app_id for app_id in app_ids if app_id not in found_ids]
+
+
+async def _iter_subscription_infos(filter_dict: Dict):
+    """Stream push targets matching a filter without loading every subscription into memory."""
+    async for target in PushSubscription.find(
+        filter_dict,
+        projection_model=PushSubscriptionTarget,
+        batch_size=500
+    ):
+        yield {"endpoint": target.endpoint, "keys": target.keys}
+
+
+async def _find_subscription_page(filter_dict: Dict, limit: int, offset: int, include_total: bool = True):
+    """Fetch one page of subscriptions, newest first, together with the total number of matches.
+    
+    Subscriptions are projected to PushSubscriptionListView, so the keys are not loaded.
+    The count and the page are queried concurrently. When include_total is False the
+    count is skipped and the total is reported as offset + number of returned subscriptions.
+    
+    Returns:
+        Tuple of (total, subscriptions)
+    """
+    page_query = (
+        PushSubscription.find(filter_dict, projection_model=PushSubscriptionListView)
+        .sort("-created_at")
+        .skip(offset)
+        .limit(limit)
+        .to_list()
+    )
+    
+    if not include_total:
+        subscriptions = await page_query
+        return offset + len(subscriptions), subscriptions
+    
+    if filter_dict:
+        count_query = PushSubscription.find(filter_dict).count()
+    else:
+        # Unfiltered listing: collection metadata count avoids scanning the collection
+        count_query = PushSubscription.get_motor_collection().estimated_document_count()
+    
+    total, subscriptions = await asyncio.gather(count_query, page_query)
+    return total, subscriptions
+
+
 # Create main FastAPI app with Swagger enabled
 # Note: docs_url and redoc_url must be accessible, so we use /api-v1 prefix
 app = FastAPI(
@@ -27,7 +131,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api-v1/docs",
     redoc_url="/api-v1/redoc",
-    openapi_url="/api-v1/openapi.json"
+    openapi_url="/api-v1/openapi.json",
+    default_response_class=ORJSONResponse
 )
 
 # Create API router with /api-v1 prefix
@@ -48,14 +153,23 @@ async def root_redirect():
     })
 
 # CORS middleware
+# Comma-separated list of allowed frontend origins, e.g. "https://push.example.com".
+# Unset means no cross-origin browser access; "*" allows any origin but never with credentials.
+CORS_ORIGINS = [origin.strip() for origin in os.getenv("CORS_ORIGINS", "").split(",") if origin.strip()]
+CORS_ALLOW_CREDENTIALS = "*" not in CORS_ORIGINS
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # In production, specify frontend origin
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=CORS_ORIGINS,
+    allow_credentials=CORS_ALLOW_CREDENTIALS,
+    allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type", "X-Application-Secret"],
+    max_age=86400,  # Let browsers cache preflight responses for a day
 )
 
+# Compress large JSON responses (user/application lists); small bodies are sent as-is
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 
 # Pydantic models
 class SubscriptionData(BaseModel):
@@ -203,17 +317,45 @@ async def startup_event():
         silent=False
     )
     
+    # Keys may have just been generated; let push_service pick them up on first use
+    reset_vapid_reload()
+    
     if not public_key or not private_key:
         logger.error("Failed to ensure VAPID keys are available. Push notifications may not work.")
-    elif was_generated:
-        logger.warning("VAPID keys were auto-generated. Please verify they are correct for production use.")
     else:
-        logger.info("VAPID keys are configured and valid.")
+        # Validate the keys push_service will actually sign with
+        keys_valid = vapid_keys_valid()
+        if keys_valid is False:
+            logger.error("VAPID keys failed validation. Push notifications will not work until they are fixed.")
+        elif was_generated:
+            logger.warning("VAPID keys were auto-generated. Please verify they are correct for production use.")
+        elif keys_valid is None:
+            logger.warning("VAPID keys are configured but could not be validated.")
+        else:
+            logger.info("VAPID keys are configured and valid.")
     
     # Initialize database
     from db_models import PushSubscription, Admin, Application
     await init_database([PushSubscription, Admin, Application])
     
+    # One-off migration: subscriptions used to store application_id as a hex string.
+    # Only valid ObjectId strings are converted; a failed migration must not stop startup.
+    try:
+        collection = PushSubscription.get_motor_collection()
+        migrated = await collection.update_many(
+            {"application_id": {"$type": "string", "$regex": "^[0-9a-fA-F]{24}$"}},
+            [{"$set": {"application_id": {"$toObjectId": "$application_id"}}}]
+        )
+        if migrated.modified_count:
+            logger.info(f"Migrated application_id to ObjectId on {migrated.modified_count} subscription(s).")
+        skipped = await collection.count_documents({"application_id": {"$type": "string"}})
+        if skipped:
+            logger.warning(
+                f"Skipped {skipped} subscription(s) whose application_id is not a valid ObjectId string."
+            )
+    except Exception as e:
+        logger.error(f"application_id migration failed: {e}", exc_info=True)
+    
     # Check if any admin exists, if not create default admin
     admin_count = await Admin.find({}).count()
     if admin_count == 0:
@@ -239,6 +381,12 @@ async def startup_event():
         logger.info(f"Found {admin_count} admin user(s) in database.")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled connections to push gateways."""
+    await close_http_client()
+
+
 @api_router.get("/")
 async def root():
     """Root endpoint."""
@@ -249,12 +397,8 @@ async def root():
 async def health_check():
     """Health check endpoint."""
     try:
-        # Check database connection
-        from motor.motor_asyncio import AsyncIOMotorClient
-        from database import MONGODB_URI
-        client = AsyncIOMotorClient(MONGODB_URI)
-        await client.admin.command('ping')
-        client.close()
+        # Check database connection on the shared client
+        await get_client().admin.command('ping')
         
         # Check VAPID keys
         public_key = get_vapid_public_key()
@@ -297,7 +441,7 @@ async def subscribe(subscription: SubscriptionData):
             application = await Application.find_one({"name": subscription.app_name})
             if application:
                 logger.info(f"Found existing application: {application.name} (ID: {application.id})")
-                application_id = str(application.id)
+                application_id = application.id
             else:
                 # Auto-create application if it doesn't exist
                 logger.info(f"Creating new application: {subscription.app_name}")
@@ -309,7 +453,7 @@ async def subscribe(subscription: SubscriptionData):
                     created_at=datetime.utcnow()
                 )
                 await new_app.insert()
-                application_id = str(new_app.id)
+                application_id = new_app.id
                 logger.info(f"Application created with ID: {application_id}")
         
         # Check if subscription already exists
@@ -324,7 +468,7 @@ async def subscribe(subscription: SubscriptionData):
                 existing.application_id = application_id
             await existing.save()
             logger.info(f"Subscription updated successfully for user_id: {subscription.user_id}, application_id: {application_id}")
-            return {"success": True, "message": "Subscription updated"}
+            return {"success": True, "message": "Subscription updated", "subscription_id": str(existing.id)}
         
         # Create new subscription
         logger.info("Creating new subscription...")
@@ -337,7 +481,7 @@ async def subscribe(subscription: SubscriptionData):
         )
         await push_sub.insert()
         logger.info(f"Subscription stored successfully for user_id: {subscription.user_id}, application_id: {application_id}")
-        return {"success": True, "message": "Subscription stored"}
+        return {"success": True, "message": "Subscription stored", "subscription_id": str(push_sub.id)}
     except Exception as e:
         logger.error(f"Error storing subscription: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Error storing subscription: {str(e)}")
@@ -354,7 +498,7 @@ async def push_single(
         # Find subscription by user_id for this application
         subscription = await PushSubscription.find_one({
             "user_id": user_id,
-            "application_id": str(application.id)
+            "application_id": application.id
         })
         
         if not subscription:
@@ -369,7 +513,7 @@ async def push_single(
         # Send push notification
         success = await send_push_notification(
             subscription_info=subscription_info,
-            payload=payload.dict()
+            payload=payload.model_dump()
         )
         
         if not success:
@@ -402,37 +546,22 @@ async def push_broadcast(
 ):
     """Send push notification to all users of this application using X-Application-Secret authentication."""
     try:
-        # Get all subscriptions for this application
-        subscriptions = await PushSubscription.find({"application_id": str(application.id)}).to_list()
+        # Stream all subscriptions for this application to the senders
+        success_count, failed_count = await send_push_stream(
+            _iter_subscription_infos({"application_id": application.id}),
+            payload.model_dump()
+        )
+        total = success_count + failed_count
         
-        if not subscriptions:
+        if not total:
             raise HTTPException(status_code=404, detail="No subscriptions found for this application")
         
-        success_count = 0
-        failed_count = 0
-        
-        for subscription in subscriptions:
-            subscription_info = {
-                "endpoint": subscription.endpoint,
-                "keys": subscription.keys
-            }
-            
-            success = await send_push_notification(
-                subscription_info=subscription_info,
-                payload=payload.dict()
-            )
-            
-            if success:
-                success_count += 1
-            else:
-                failed_count += 1
-        
         return PushResponse(
             success=True,
             message="Broadcast push notifications sent",
             success_count=success_count,
             failed_count=failed_count,
-            total=len(subscriptions)
+            total=total
         )
     except HTTPException:
         raise
@@ -454,7 +583,7 @@ async def push_to_users(
         # Find subscriptions for all user_ids in this application
         filter_dict = {
             "user_id": {"$in": request.user_ids},
-            "application_id": str(application.id)
+            "application_id": application.id
         }
         
         subscriptions = await PushSubscription.find(filter_dict).to_list()
@@ -465,24 +594,13 @@ async def push_to_users(
                 detail=f"No subscriptions found for provided user_ids in this application"
             )
         
-        success_count = 0
-        failed_count = 0
-        
-        for subscription in subscriptions:
-            subscription_info = {
-                "endpoint": subscription.endpoint,
-                "keys": subscription.keys
-            }
-            
-            success = await send_push_notification(
-                subscription_info=subscription_info,
-                payload=request.payload.dict()
-            )
-            
-            if success:
-                success_count += 1
-            else:
-                failed_count += 1
+        # Send to all subscriptions concurrently
+        results = await send_push_batch(
+            [{"endpoint": subscription.endpoint, "keys": subscription.keys} for subscription in subscriptions],
+            request.payload.model_dump()
+        )
+        success_count = sum(results)
+        failed_count = len(results) - success_count
         
         return PushResponse(
             success=True,
@@ -514,7 +632,7 @@ async def admin_login(login_data: AdminLogin):
             )
         
         # Verify password
-        if not verify_password(login_data.password, admin.password_hash):
+        if not await _verify_password_async(login_data.password, admin.password_hash):
             raise HTTPException(
                 status_code=401,
                 detail="Incorrect username or password"
@@ -539,7 +657,7 @@ async def change_password(
     """Change current admin's password."""
     try:
         # Verify current password
-        if not verify_password(password_data.current_password, current_admin.password_hash):
+        if not await _verify_password_async(password_data.current_password, current_admin.password_hash):
             raise HTTPException(
                 status_code=400,
                 detail="Current password is incorrect"
@@ -552,9 +670,10 @@ async def change_password(
                 detail="New password must be at least 6 characters long"
             )
         
-        # Update password
-        current_admin.password_hash = get_password_hash(password_data.new_password)
-        await current_admin.save()
+        # Update password in the database only; current_admin is the shared cached instance
+        new_hash = await _hash_password_async(password_data.new_password)
+        await Admin.find_one({"_id": current_admin.id}).update({"$set": {"password_hash": new_hash}})
+        invalidate_admin(current_admin.username)
         
         logger.info(f"Password changed for admin '{current_admin.username}'")
         
@@ -599,9 +718,11 @@ async def create_application(
         
         # Automatically add application to admin's application_ids if not super admin
         if not current_admin.is_super_admin:
-            if str(application.id) not in current_admin.application_ids:
-                current_admin.application_ids.append(str(application.id))
-                await current_admin.save()
+            # Update the database only; current_admin is the shared cached instance
+            await Admin.find_one({"_id": current_admin.id}).update(
+                {"$addToSet": {"application_ids": str(application.id)}}
+            )
+            invalidate_admin(current_admin.username)
         
         return ApplicationCreateResponse(
             id=str(application.id),
@@ -627,12 +748,8 @@ async def list_applications(current_admin = Depends(get_current_admin_with_permi
         else:
             # Regular admin sees only assigned applications
             if not current_admin.application_ids:
-                applications = []
-            else:
-                # Convert string IDs to ObjectId for query
-                from bson import ObjectId
-                object_ids = [ObjectId(app_id) for app_id in current_admin.application_ids]
-                applications = await Application.find({"_id": {"$in": object_ids}}).to_list()
+                return []
+            applications = await Application.find({"_id": {"$in": _admin_application_object_ids(current_admin)}}).to_list()
         
         return [
             ApplicationResponse(
@@ -658,7 +775,7 @@ async def get_application(
         # Check access to application
         await check_application_access(app_id, current_admin)
         
-        application = await Application.get(app_id)
+        application = await get_application_cached(app_id)
         if not application:
             raise HTTPException(status_code=404, detail="Application not found")
         
@@ -705,6 +822,7 @@ async def update_application(
             application.store_fingerprint = app_data.store_fingerprint
         
         await application.save()
+        invalidate_application(app_id)
         
         return ApplicationResponse(
             id=str(application.id),
@@ -740,6 +858,7 @@ async def reset_application_secret(
         # Update application
         application.secret_hash = secret_hash
         await application.save()
+        invalidate_application(app_id)
         
         return ApplicationCreateResponse(
             id=str(application.id),
@@ -770,7 +889,7 @@ async def delete_application(
             raise HTTPException(status_code=404, detail="Application not found")
         
         # Check if any users are linked to this application
-        linked_users_count = await PushSubscription.find({"application_id": app_id}).count()
+        linked_users_count = await PushSubscription.find({"application_id": application.id}).count()
         
         if linked_users_count > 0:
             raise HTTPException(
@@ -780,6 +899,7 @@ async def delete_application(
         
         # Delete the application
         await application.delete()
+        invalidate_application(app_id)
         
         logger.info(f"Application {app_id} ({application.name}) deleted by admin {current_admin.username}")
         
@@ -803,6 +923,7 @@ async def list_users(
     user_id: Optional[str] = Query(None),
     created_from: Optional[str] = Query(None),
     created_to: Optional[str] = Query(None),
+    include_total: bool = Query(True),
     current_admin = Depends(get_current_admin_with_permissions)
 ):
     """List users with pagination and optional filtering. Regular admins only see users from their assigned applications."""
@@ -821,11 +942,19 @@ async def list_users(
                     limit=limit,
                     offset=offset
                 )
-            filter_dict["application_id"] = str(application.id)
+            filter_dict["application_id"] = application.id
         
         # Filter by application_id if provided
         if application_id:
-            filter_dict["application_id"] = application_id
+            # Malformed IDs cannot match any subscription
+            if not PydanticObjectId.is_valid(application_id):
+                return UserListResponse(
+                    users=[],
+                    total=0,
+                    limit=limit,
+                    offset=offset
+                )
+            filter_dict["application_id"] = PydanticObjectId(application_id)
             # Check if admin has access to this application
             if not current_admin.is_super_admin:
                 if application_id not in current_admin.application_ids:
@@ -843,7 +972,7 @@ async def list_users(
                 # Only show users from allowed applications
                 if "application_id" in filter_dict:
                     # Check if filtered application is in allowed list
-                    if filter_dict["application_id"] not in current_admin.application_ids:
+                    if str(filter_dict["application_id"]) not in current_admin.application_ids:
                         return UserListResponse(
                             users=[],
                             total=0,
@@ -852,7 +981,7 @@ async def list_users(
                         )
                 else:
                     # Filter by allowed application IDs
-                    filter_dict["application_id"] = {"$in": current_admin.application_ids}
+                    filter_dict["application_id"] = {"$in": _admin_application_object_ids(current_admin)}
             else:
                 # Admin has no assigned applications, return empty
                 return UserListResponse(
@@ -862,53 +991,47 @@ async def list_users(
                     offset=offset
                 )
         
-        # Filter by user_id (partial match using regex)
+        # Filter by user_id prefix (anchored regex so the user_id index can be used)
         if user_id:
-            filter_dict["user_id"] = {"$regex": user_id, "$options": "i"}
+            filter_dict["user_id"] = {"$regex": f"^{re.escape(user_id)}"}
         
         # Filter by created_from date
         if created_from:
-            try:
-                from_date = datetime.fromisoformat(created_from.replace('Z', '+00:00'))
-                if "created_at" not in filter_dict:
-                    filter_dict["created_at"] = {}
-                filter_dict["created_at"]["$gte"] = from_date
-            except ValueError:
+            from_date = _parse_iso_date(created_from)
+            if from_date:
+                filter_dict.setdefault("created_at", {})["$gte"] = from_date
+            else:
                 logger.warning(f"Invalid created_from date format: {created_from}")
         
         # Filter by created_to date
         if created_to:
-            try:
-                to_date = datetime.fromisoformat(created_to.replace('Z', '+00:00'))
-                if "created_at" not in filter_dict:
-                    filter_dict["created_at"] = {}
-                filter_dict["created_at"]["$lte"] = to_date
-            except ValueError:
+            to_date = _parse_iso_date(created_to)
+            if to_date:
+                filter_dict.setdefault("created_at", {})["$lte"] = to_date
+            else:
                 logger.warning(f"Invalid created_to date format: {created_to}")
         
-        # Get total count
-        total = await PushSubscription.find(filter_dict).count()
+        # Get paginated subscriptions and total count
+        total, subscriptions = await _find_subscription_page(filter_dict, limit, offset, include_total)
         
-        # Get paginated subscriptions
-        subscriptions = await PushSubscription.find(filter_dict).skip(offset).limit(limit).to_list()
+        # Resolve application names for the whole page with a single query
+        app_ids = {sub.application_id for sub in subscriptions if sub.application_id}
+        application_names = {}
+        if app_ids:
+            apps = await Application.find({"_id": {"$in": list(app_ids)}}).to_list()
+            application_names = {app.id: app.name for app in apps}
         
-        # Get application names for each subscription
-        user_responses = []
-        for sub in subscriptions:
-            application_name_value = None
-            if sub.application_id:
-                app = await Application.get(sub.application_id)
-                if app:
-                    application_name_value = app.name
-            
-            user_responses.append(UserResponse(
+        user_responses = [
+            UserResponse.model_construct(
                 id=str(sub.id),
                 user_id=sub.user_id,
                 endpoint=sub.endpoint,
-                application_id=sub.application_id,
-                application_name=application_name_value,
+                application_id=str(sub.application_id) if sub.application_id else None,
+                application_name=application_names.get(sub.application_id),
                 created_at=sub.created_at
-            ))
+            )
+            for sub in subscriptions
+        ]
         
         return UserListResponse(
             users=user_responses,
@@ -935,7 +1058,7 @@ async def get_user(
         # Check if admin has access to this user's application
         if not current_admin.is_super_admin:
             if subscription.application_id:
-                if subscription.application_id not in current_admin.application_ids:
+                if str(subscription.application_id) not in current_admin.application_ids:
                     raise HTTPException(
                         status_code=403,
                         detail="You don't have permission to access this user"
@@ -944,15 +1067,15 @@ async def get_user(
         # Get application name if linked
         application_name = None
         if subscription.application_id:
-            app = await Application.get(subscription.application_id)
+            app = await get_application_cached(subscription.application_id)
             if app:
                 application_name = app.name
         
-        return UserResponse(
+        return UserResponse.model_construct(
             id=str(subscription.id),
             user_id=subscription.user_id,
             endpoint=subscription.endpoint,
-            application_id=subscription.application_id,
+            application_id=str(subscription.application_id) if subscription.application_id else None,
             application_name=application_name,
             created_at=subscription.created_at
         )
@@ -970,21 +1093,27 @@ async def delete_user(
 ):
     """Delete a user subscription. Regular admins can only delete users from their assigned applications."""
     try:
-        subscription = await PushSubscription.get(user_id)
-        if not subscription:
+        if not PydanticObjectId.is_valid(user_id):
             raise HTTPException(status_code=404, detail="User not found")
         
-        # Check if admin has access to this user's application
+        # Delete in one query, with the access check folded into the filter.
+        # Regular admins may delete unassigned users and users of their own applications.
+        filter_dict = {"_id": PydanticObjectId(user_id)}
         if not current_admin.is_super_admin:
-            if subscription.application_id:
-                if subscription.application_id not in current_admin.application_ids:
-                    raise HTTPException(
-                        status_code=403,
-                        detail="You don't have permission to delete this user"
-                    )
-        
-        # Delete the subscription
-        await subscription.delete()
+            filter_dict["$or"] = [
+                {"application_id": None},
+                {"application_id": {"$in": _admin_application_object_ids(current_admin)}}
+            ]
+        
+        result = await PushSubscription.find_one(filter_dict).delete()
+        if not result or result.deleted_count == 0:
+            # Nothing deleted: tell a missing user apart from a forbidden one
+            if await PushSubscription.find({"_id": PydanticObjectId(user_id)}).count():
+                raise HTTPException(
+                    status_code=403,
+                    detail="You don't have permission to delete this user"
+                )
+            raise HTTPException(status_code=404, detail="User not found")
         
         logger.info(f"User {user_id} deleted by admin {current_admin.username}")
         
@@ -1004,6 +1133,7 @@ async def list_app_users(
     limit: int = Query(100, ge=1, le=100),
     offset: int = Query(0, ge=0),
     user_id: Optional[str] = Query(None),
+    include_total: bool = Query(True),
     application = Depends(verify_application_secret)
 ):
     """
@@ -1012,25 +1142,22 @@ async def list_app_users(
     """
     try:
         # Build filter - only show users from this application
-        filter_dict = {"application_id": str(application.id)}
+        filter_dict = {"application_id": application.id}
         
-        # Filter by user_id (partial match using regex)
+        # Filter by user_id prefix (anchored regex so the user_id index can be used)
         if user_id:
-            filter_dict["user_id"] = {"$regex": user_id, "$options": "i"}
-        
-        # Get total count
-        total = await PushSubscription.find(filter_dict).count()
+            filter_dict["user_id"] = {"$regex": f"^{re.escape(user_id)}"}
         
-        # Get paginated subscriptions
-        subscriptions = await PushSubscription.find(filter_dict).skip(offset).limit(limit).to_list()
+        # Get paginated subscriptions and total count
+        total, subscriptions = await _find_subscription_page(filter_dict, limit, offset, include_total)
         
         # Build user responses
         user_responses = [
-            UserResponse(
+            UserResponse.model_construct(
                 id=str(sub.id),
                 user_id=sub.user_id,
                 endpoint=sub.endpoint,
-                application_id=sub.application_id,
+                application_id=str(sub.application_id) if sub.application_id else None,
                 application_name=application.name,
                 created_at=sub.created_at
             )
@@ -1058,11 +1185,12 @@ async def create_user(
     """Create a new user subscription manually. Regular admins can only create users for their assigned applications."""
     try:
         # Validate application_id if provided
+        application = None
         if user_data.application_id:
             # Check if admin has access to this application
             await check_application_access(user_data.application_id, current_admin)
             
-            application = await Application.get(user_data.application_id)
+            application = await get_application_cached(user_data.application_id)
             if not application:
                 raise HTTPException(status_code=404, detail="Application not found")
         
@@ -1079,26 +1207,19 @@ async def create_user(
             endpoint=user_data.endpoint,
             keys=user_data.keys,
             user_id=user_data.user_id,
-            application_id=user_data.application_id,
+            application_id=application.id if application else None,
             created_at=datetime.utcnow()
         )
         await subscription.insert()
         
-        # Get application name if linked
-        application_name = None
-        if subscription.application_id:
-            app = await Application.get(subscription.application_id)
-            if app:
-                application_name = app.name
-        
         logger.info(f"User {user_data.user_id} created by admin {current_admin.username}")
         
-        return UserResponse(
+        return UserResponse.model_construct(
             id=str(subscription.id),
             user_id=subscription.user_id,
             endpoint=subscription.endpoint,
-            application_id=subscription.application_id,
-            application_name=application_name,
+            application_id=str(subscription.application_id) if subscription.application_id else None,
+            application_name=application.name if application else None,
             created_at=subscription.created_at
         )
     except HTTPException:
@@ -1121,35 +1242,32 @@ async def assign_user_to_application(
             raise HTTPException(status_code=404, detail="User not found")
         
         # Validate application_id if provided (to assign)
+        application = None
         if assign_data.application_id:
             # Check if admin has access to this application
             await check_application_access(assign_data.application_id, current_admin)
             
-            application = await Application.get(assign_data.application_id)
+            application = await get_application_cached(assign_data.application_id)
             if not application:
                 raise HTTPException(status_code=404, detail="Application not found")
-            subscription.application_id = assign_data.application_id
+            subscription.application_id = application.id
         else:
             # Unassign if application_id is None
             subscription.application_id = None
         
-        await subscription.save()
-        
-        # Get application name if linked
-        application_name = None
-        if subscription.application_id:
-            app = await Application.get(subscription.application_id)
-            if app:
-                application_name = app.name
+        # Only application_id changes, so write just that field instead of the whole document
+        await PushSubscription.find_one({"_id": subscription.id}).update(
+            {"$set": {"application_id": subscription.application_id}}
+        )
         
         logger.info(f"User {user_id} assigned to application {assign_data.application_id or 'none'} by admin {current_admin.username}")
         
-        return UserResponse(
+        return UserResponse.model_construct(
             id=str(subscription.id),
             user_id=subscription.user_id,
             endpoint=subscription.endpoint,
-            application_id=subscription.application_id,
-            application_name=application_name,
+            application_id=str(subscription.application_id) if subscription.application_id else None,
+            application_name=application.name if application else None,
             created_at=subscription.created_at
         )
     except HTTPException:
@@ -1165,12 +1283,13 @@ async def assign_user_to_application(
 async def admin_push_single(
     user_id: str,
     payload: PushPayload,
-    current_admin = Depends(get_current_admin_with_permissions)
+    current_admin = Depends(get_current_admin_with_permissions),
+    subscription_loader: SubscriptionLoader = Depends(get_subscription_loader)
 ):
     """Send push notification to a specific user (admin endpoint). Regular admins can only push to users from their assigned applications."""
     try:
-        # Find subscription by user_id
-        subscription = await PushSubscription.find_one({"user_id": user_id})
+        # Find subscription by user_id (batched with concurrent single-push requests)
+        subscription = await subscription_loader.load(user_id)
         
         if not subscription:
             raise HTTPException(status_code=404, detail="Subscription not found")
@@ -1178,7 +1297,7 @@ async def admin_push_single(
         # Check if admin has access to this user's application
         if not current_admin.is_super_admin:
             if subscription.application_id:
-                if subscription.application_id not in current_admin.application_ids:
+                if str(subscription.application_id) not in current_admin.application_ids:
                     raise HTTPException(
                         status_code=403,
                         detail="You don't have permission to send push to this user"
@@ -1193,7 +1312,7 @@ async def admin_push_single(
         # Send push notification
         success = await send_push_notification(
             subscription_info=subscription_info,
-            payload=payload.dict()
+            payload=payload.model_dump()
         )
         
         if not success:
@@ -1226,42 +1345,30 @@ async def admin_push_broadcast(
 ):
     """Send push notification to all subscribed users (admin endpoint). Regular admins only push to users from their assigned applications."""
     try:
-        # Get subscriptions based on admin permissions
+        # Select subscriptions based on admin permissions
         if current_admin.is_super_admin:
-            subscriptions = await PushSubscription.find({}).to_list()
+            filter_dict = {}
         else:
             if not current_admin.application_ids:
                 raise HTTPException(status_code=403, detail="You don't have permission to send broadcast push")
-            subscriptions = await PushSubscription.find({"application_id": {"$in": current_admin.application_ids}}).to_list()
-        
-        if not subscriptions:
-            raise HTTPException(status_code=404, detail="No subscriptions found")
+            filter_dict = {"application_id": {"$in": _admin_application_object_ids(current_admin)}}
         
-        success_count = 0
-        failed_count = 0
+        # Stream matching subscriptions to the senders
+        success_count, failed_count = await send_push_stream(
+            _iter_subscription_infos(filter_dict),
+            payload.model_dump()
+        )
+        total = success_count + failed_count
         
-        for subscription in subscriptions:
-            subscription_info = {
-                "endpoint": subscription.endpoint,
-                "keys": subscription.keys
-            }
-            
-            success = await send_push_notification(
-                subscription_info=subscription_info,
-                payload=payload.dict()
-            )
-            
-            if success:
-                success_count += 1
-            else:
-                failed_count += 1
+        if not total:
+            raise HTTPException(status_code=404, detail="No subscriptions found")
         
         return PushResponse(
             success=True,
             message="Broadcast push notifications sent",
             success_count=success_count,
             failed_count=failed_count,
-            total=len(subscriptions)
+            total=total
         )
     except HTTPException:
         raise
@@ -1282,44 +1389,29 @@ async def admin_push_to_application(
         await check_application_access(app_id, current_admin)
         
         # Verify application exists
-        application = await Application.get(app_id)
+        application = await get_application_cached(app_id)
         if not application:
             raise HTTPException(status_code=404, detail="Application not found")
         
-        # Get all subscriptions for this application
-        subscriptions = await PushSubscription.find({"application_id": app_id}).to_list()
+        # Stream all subscriptions for this application to the senders
+        success_count, failed_count = await send_push_stream(
+            _iter_subscription_infos({"application_id": application.id}),
+            payload.model_dump()
+        )
+        total = success_count + failed_count
         
-        if not subscriptions:
+        if not total:
             raise HTTPException(
                 status_code=404,
                 detail=f"No subscriptions found for application: {application.name}"
             )
         
-        success_count = 0
-        failed_count = 0
-        
-        for subscription in subscriptions:
-            subscription_info = {
-                "endpoint": subscription.endpoint,
-                "keys": subscription.keys
-            }
-            
-            success = await send_push_notification(
-                subscription_info=subscription_info,
-                payload=payload.dict()
-            )
-            
-            if success:
-                success_count += 1
-            else:
-                failed_count += 1
-        
         return PushResponse(
             success=True,
             message=f"Push notifications sent to application: {application.name}",
             success_count=success_count,
             failed_count=failed_count,
-            total=len(subscriptions)
+            total=total
         )
     except HTTPException:
         raise
@@ -1341,10 +1433,10 @@ async def admin_push_to_users(
         # Find subscriptions for all user_ids
         filter_dict = {"user_id": {"$in": request.user_ids}}
         
-        # Filter by admin permissions (if not super admin)
+        # Filter by admin permissions (if not super admin); the query alone enforces access
         if not current_admin.is_super_admin:
             if current_admin.application_ids:
-                filter_dict["application_id"] = {"$in": current_admin.application_ids}
+                filter_dict["application_id"] = {"$in": _admin_application_object_ids(current_admin)}
             else:
                 raise HTTPException(
                     status_code=403,
@@ -1359,38 +1451,20 @@ async def admin_push_to_users(
                 detail=f"No subscriptions found for provided user_ids"
             )
         
-        # Filter subscriptions to only include those admin has access to
-        if not current_admin.is_super_admin:
-            subscriptions = [s for s in subscriptions if s.application_id and s.application_id in current_admin.application_ids]
-        
         # Create a map of user_id to subscription for quick lookup
         subscription_map = {sub.user_id: sub for sub in subscriptions if sub.user_id}
         
-        success_count = 0
-        failed_count = 0
-        not_found_count = 0
-        
-        for user_id in request.user_ids:
-            subscription = subscription_map.get(user_id)
-            
-            if not subscription:
-                not_found_count += 1
-                continue
-            
-            subscription_info = {
-                "endpoint": subscription.endpoint,
-                "keys": subscription.keys
-            }
-            
-            success = await send_push_notification(
-                subscription_info=subscription_info,
-                payload=request.payload.dict()
-            )
-            
-            if success:
-                success_count += 1
-            else:
-                failed_count += 1
+        # Send to every requested user that has a subscription, concurrently
+        results = await send_push_batch(
+            [
+                {"endpoint": subscription_map[user_id].endpoint, "keys": subscription_map[user_id].keys}
+                for user_id in request.user_ids
+                if user_id in subscription_map
+            ],
+            request.payload.model_dump()
+        )
+        success_count = sum(results)
+        failed_count = len(results) - success_count
         
         return PushResponse(
             success=True,
@@ -1432,16 +1506,15 @@ async def create_admin(
         
         # Validate application IDs if provided
         if admin_data.application_ids:
-            for app_id in admin_data.application_ids:
-                application = await Application.get(app_id)
-                if not application:
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"Application with ID {app_id} not found"
-                    )
+            missing_ids = await _find_missing_application_ids(admin_data.application_ids)
+            if missing_ids:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Applications not found: {', '.join(missing_ids)}"
+                )
         
         # Create admin
-        password_hash = get_password_hash(admin_data.password)
+        password_hash = await _hash_password_async(admin_data.password)
         admin = Admin(
             username=admin_data.username,
             password_hash=password_hash,
@@ -1480,7 +1553,7 @@ async def list_admins(current_admin = Depends(get_current_admin_with_permissions
         
         admins = await Admin.find_all().to_list()
         return [
-            AdminResponse(
+            AdminResponse.model_construct(
                 id=str(admin.id),
                 username=admin.username,
                 is_super_admin=admin.is_super_admin,
@@ -1511,39 +1584,49 @@ async def update_admin(
                 detail="Only super admins can update other admins"
             )
         
-        # Get admin to update
-        admin = await Admin.get(admin_id)
-        if not admin:
+        if not PydanticObjectId.is_valid(admin_id):
             raise HTTPException(status_code=404, detail="Admin not found")
         
         # Prevent self-demotion from super admin
-        if str(admin.id) == str(current_admin.id) and admin_data.is_super_admin is False:
+        if admin_id == str(current_admin.id) and admin_data.is_super_admin is False:
             raise HTTPException(
                 status_code=400,
                 detail="You cannot remove super admin status from yourself"
             )
         
+        # Collect the provided fields into a single $set
+        update_fields = {}
+        
         # Update password if provided
         if admin_data.password:
-            admin.password_hash = get_password_hash(admin_data.password)
+            update_fields["password_hash"] = await _hash_password_async(admin_data.password)
         
         # Update super admin status if provided
         if admin_data.is_super_admin is not None:
-            admin.is_super_admin = admin_data.is_super_admin
+            update_fields["is_super_admin"] = admin_data.is_super_admin
         
         # Update application IDs if provided
         if admin_data.application_ids is not None:
             # Validate application IDs
-            for app_id in admin_data.application_ids:
-                application = await Application.get(app_id)
-                if not application:
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"Application with ID {app_id} not found"
-                    )
-            admin.application_ids = admin_data.application_ids
+            missing_ids = await _find_missing_application_ids(admin_data.application_ids)
+            if missing_ids:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Applications not found: {', '.join(missing_ids)}"
+                )
+            update_fields["application_ids"] = admin_data.application_ids
         
-        await admin.save()
+        # Apply the update atomically and get the updated admin back in the same round-trip
+        if update_fields:
+            admin = await Admin.find_one({"_id": PydanticObjectId(admin_id)}).update(
+                {"$set": update_fields},
+                response_type=UpdateResponse.NEW_DOCUMENT
+            )
+        else:
+            admin = await Admin.get(admin_id)
+        if not admin:
+            raise HTTPException(status_code=404, detail="Admin not found")
+        invalidate_admin(admin.username)
         
         logger.info(f"Admin '{admin.username}' updated by super admin '{current_admin.username}'")
         
@@ -1589,6 +1672,7 @@ async def delete_admin(
         
         # Delete admin
         await admin.delete()
+        invalidate_admin(admin.username)
         
         logger.info(f"Admin '{admin.username}' deleted by super admin '{current_admin.username}'")
         
@@ -1623,7 +1707,7 @@ async def change_password(
     """Change current admin's password."""
     try:
         # Verify current password
-        if not verify_password(password_data.current_password, current_admin.password_hash):
+        if not await _verify_password_async(password_data.current_password, current_admin.password_hash):
             raise HTTPException(
                 status_code=400,
                 detail="Current password is incorrect"
@@ -1636,9 +1720,10 @@ async def change_password(
                 detail="New password must be at least 6 characters long"
             )
         
-        # Update password
-        current_admin.password_hash = get_password_hash(password_data.new_password)
-        await current_admin.save()
+        # Update password in the database only; current_admin is the shared cached instance
+        new_hash = await _hash_password_async(password_data.new_password)
+        await Admin.find_one({"_id": current_admin.id}).update({"$set": {"password_hash": new_hash}})
+        invalidate_admin(current_admin.username)
         
         logger.info(f"Password changed for admin '{current_admin.username}'")
         
@@ -1684,13 +1769,13 @@ def custom_openapi():
     openapi_schema["info"]["version"] = app.version
     openapi_schema["info"]["description"] = app.description
     
-    # Log schema generation for debugging
-    paths_count = len(openapi_schema.get('paths', {}))
-    logger.info(f"OpenAPI schema generated with {paths_count} paths")
+    # Log schema generation for debugging (only pay for it when the level is enabled)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(f"OpenAPI schema generated with {len(openapi_schema['paths'])} paths")
     
     # Debug: Print first few paths to verify they include /api-v1 prefix
-    if paths_count > 0:
-        sample_paths = list(openapi_schema.get('paths', {}).keys())[:5]
+    if logger.isEnabledFor(logging.DEBUG) and openapi_schema["paths"]:
+        sample_paths = list(openapi_schema["paths"])[:5]
         logger.debug(f"Sample paths in schema: {sample_paths}")
     
     app.openapi_schema = openapi_schema
@@ -1700,6 +1785,21 @@ def custom_openapi():
 # This must be done after router is mounted so all routes are included
 app.openapi = custom_openapi
 
+# Serialized schema, built on the first /openapi.json request
+_openapi_json: Optional[bytes] = None
+
+
+async def openapi_json(request: Request) -> Response:
+    """Serve the OpenAPI schema from cached bytes instead of re-encoding the dict on every request."""
+    global _openapi_json
+    if _openapi_json is None:
+        _openapi_json = orjson.dumps(app.openapi())
+    return Response(content=_openapi_json, media_type="application/json")
+
+# Replace FastAPI's built-in schema route with the cached one
+app.router.routes = [route for route in app.router.routes if getattr(route, "path", None) != app.openapi_url]
+app.add_route(app.openapi_url, openapi_json, include_in_schema=False)
+
 
 if __name__ == "__main__":
     import uvicorn
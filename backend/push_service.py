@@ -1,39 +1,122 @@
 """VAPID push service for sending Web Push notifications."""
 import os
 import json
+import time
+import asyncio
 import logging
-from typing import Dict, Optional
-from pywebpush import webpush, WebPushException
-from dotenv import load_dotenv
+import functools
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import httpx
+import orjson
+from py_vapid import Vapid
+from pywebpush import WebPusher
+from env_cache import load_env_once
 
-load_dotenv()
+load_env_once()
 
 logger = logging.getLogger(__name__)
 
+# Timeout (seconds) for requests to push gateways
+PUSH_REQUEST_TIMEOUT = 10
+
+# Maximum number of notifications in flight at once when sending to many subscriptions
+PUSH_CONCURRENCY = int(os.getenv("PUSH_CONCURRENCY", "50"))
+
+# Dedicated threads for payload encryption, so large fan-outs do not exhaust the
+# default executor shared with the rest of the application
+PUSH_POOL_SIZE = int(os.getenv("PUSH_POOL_SIZE", "8"))
+_PUSH_POOL = ThreadPoolExecutor(max_workers=PUSH_POOL_SIZE, thread_name_prefix="webpush")
+
+# Per push service (endpoint host) limits, so one slow or failing gateway cannot
+# hold every send slot: bounded in-flight requests, and a circuit breaker that
+# suspends sends for a cooldown after consecutive transport or 5xx failures
+PUSH_ORIGIN_CONCURRENCY = int(os.getenv("PUSH_ORIGIN_CONCURRENCY", "32"))
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_COOLDOWN = 60
+
+_origin_semaphores: Dict[str, asyncio.Semaphore] = {}
+# Push service host -> (consecutive failures, time the circuit opened)
+_origin_failures: Dict[str, Tuple[int, float]] = {}
+
+# Web Push content encoding used for every message
+PUSH_CONTENT_ENCODING = "aes128gcm"
+
+# Shared async HTTP client so pushes reuse keep-alive connections (and TLS sessions)
+# to the push gateways and are delivered without tying up a thread per request
+_http_client = httpx.AsyncClient(
+    timeout=httpx.Timeout(PUSH_REQUEST_TIMEOUT, connect=5.0),
+    limits=httpx.Limits(max_connections=200, max_keepalive_connections=100)
+)
+
+
+async def close_http_client():
+    """Close pooled connections to push gateways (called on application shutdown)."""
+    await _http_client.aclose()
+
+
+# VAPID JWTs are issued for 12 hours; signed headers are reused for 11 of them,
+# so a cached token always has at least an hour of validity left when sent
+VAPID_TOKEN_LIFETIME = 12 * 60 * 60
+VAPID_HEADER_CACHE_TTL = 11 * 60 * 60
+VAPID_HEADER_CACHE_SIZE = 64
+
+# Signed VAPID headers keyed by (private key, push service origin) -> (expires_at, headers)
+_vapid_header_cache: Dict[Tuple[str, str], Tuple[float, Dict[str, str]]] = {}
+
+
 # Function to reload VAPID keys from environment (useful after key generation)
 def _reload_vapid_keys():
     """Reload VAPID keys from environment variables."""
     global VAPID_PRIVATE_KEY, VAPID_PUBLIC_KEY, VAPID_EMAIL, VAPID_CLAIMS
-    load_dotenv(override=True)  # Reload .env file
+    load_env_once(override=True)  # Reload .env file (re-parsed only if it changed)
     VAPID_PRIVATE_KEY = os.getenv("VAPID_PRIVATE_KEY")
     VAPID_PUBLIC_KEY = os.getenv("VAPID_PUBLIC_KEY")
     VAPID_EMAIL = os.getenv("VAPID_EMAIL", "mailto:example@example.com")
-    VAPID_CLAIMS = {
+    VAPID_CLAIMS = MappingProxyType({
         "sub": VAPID_EMAIL
-    }
+    })
+    _vapid_header_cache.clear()
+    _get_vapid_signer.cache_clear()
+
+
+# Minimum interval between reloads while keys are missing, so a deployment without
+# keys does not go back to the environment and .env file on every push
+VAPID_RELOAD_INTERVAL = 60
+_last_reload_attempt: Optional[float] = None
+
+
+def _reload_missing_vapid_keys():
+    """Reload VAPID keys that were found missing, at most once per VAPID_RELOAD_INTERVAL."""
+    global _last_reload_attempt
+    now = time.monotonic()
+    if _last_reload_attempt is not None and now - _last_reload_attempt < VAPID_RELOAD_INTERVAL:
+        return
+    _last_reload_attempt = now
+    _reload_vapid_keys()
+
+
+def reset_vapid_reload():
+    """Let the next lookup reload missing VAPID keys immediately (e.g. right after generating them)."""
+    global _last_reload_attempt
+    _last_reload_attempt = None
 
 # Initial load of VAPID keys
 VAPID_PRIVATE_KEY = os.getenv("VAPID_PRIVATE_KEY")
 VAPID_PUBLIC_KEY = os.getenv("VAPID_PUBLIC_KEY")
 VAPID_EMAIL = os.getenv("VAPID_EMAIL", "mailto:example@example.com")
 
-VAPID_CLAIMS = {
+# Constant claims shared by every VAPID token (read-only; per-token claims are added on signing)
+VAPID_CLAIMS = MappingProxyType({
     "sub": VAPID_EMAIL
-}
+})
 
-# Validate VAPID keys on import
-def _validate_keys_on_import():
-    """Validate VAPID keys when module is imported.
+# Validation result per key pair, so reloading unchanged keys does not validate them again
+@functools.lru_cache(maxsize=4)
+def _validate_keys(public_key: str, private_key: str) -> Optional[bool]:
+    """Validate a VAPID key pair, logging why it is unusable.
     
     Returns:
         True if keys are valid, False if invalid, None if validation unavailable
@@ -41,7 +124,7 @@ def _validate_keys_on_import():
     try:
         from generate_vapid_keys import validate_vapid_keys
         
-        if not VAPID_PUBLIC_KEY or not VAPID_PRIVATE_KEY:
+        if not public_key or not private_key:
             logger.warning(
                 "VAPID keys are not configured. "
                 "Keys will be auto-generated on application startup if possible. "
@@ -50,7 +133,7 @@ def _validate_keys_on_import():
             )
             return False
         
-        if not validate_vapid_keys(VAPID_PUBLIC_KEY, VAPID_PRIVATE_KEY):
+        if not validate_vapid_keys(public_key, private_key):
             logger.error(
                 "VAPID keys are invalid. "
                 "Please regenerate keys using: python scripts/init_vapid_keys.py "
@@ -68,8 +151,20 @@ def _validate_keys_on_import():
         logger.warning(f"Error validating VAPID keys: {e}")
         return None
 
-# Perform validation on import
-_VAPID_KEYS_VALID = _validate_keys_on_import()
+
+def vapid_keys_valid() -> Optional[bool]:
+    """Check the currently loaded VAPID keys, validating them on first use.
+    
+    Validation is deferred until needed instead of running at import time;
+    the application startup calls this once keys have been ensured.
+    
+    Returns:
+        True if keys are valid, False if invalid, None if validation unavailable
+    """
+    # Keys may have been generated after import
+    if not VAPID_PUBLIC_KEY or not VAPID_PRIVATE_KEY:
+        _reload_missing_vapid_keys()
+    return _validate_keys(VAPID_PUBLIC_KEY or "", VAPID_PRIVATE_KEY or "")
 
 
 def get_vapid_public_key() -> Optional[str]:
@@ -83,60 +178,274 @@ def get_vapid_public_key() -> Optional[str]:
     """
     # Reload keys if not available (in case they were generated after import)
     if not VAPID_PUBLIC_KEY:
-        _reload_vapid_keys()
+        _reload_missing_vapid_keys()
     
     if not VAPID_PUBLIC_KEY:
         logger.warning("VAPID public key is not configured")
     return VAPID_PUBLIC_KEY
 
 
-async def send_push_notification(
-    subscription_info: Dict,
-    payload: Dict,
-    vapid_private_key: Optional[str] = None
-) -> bool:
+@functools.lru_cache(maxsize=4)
+def _get_vapid_signer(private_key: str) -> Vapid:
+    """Parse a VAPID private key once and reuse the signer for every token signed with it."""
+    return Vapid.from_string(private_key=private_key)
+
+
+def _get_vapid_headers(endpoint: str, private_key: str) -> Dict[str, str]:
+    """Return signed VAPID headers for the push service serving an endpoint.
+    
+    The JWT audience only depends on the endpoint origin, so one signature is
+    shared by every subscription on the same push service until the cache entry expires.
     """
-    Send a push notification to a subscription.
+    url = urlparse(endpoint)
+    audience = f"{url.scheme}://{url.netloc}"
+    cache_key = (private_key, audience)
+    now = time.time()
+    
+    cached = _vapid_header_cache.get(cache_key)
+    if cached and cached[0] > now:
+        return cached[1]
+    
+    claims = {
+        **VAPID_CLAIMS,
+        "aud": audience,
+        "exp": int(now) + VAPID_TOKEN_LIFETIME
+    }
+    headers = _get_vapid_signer(private_key).sign(claims)
+    
+    if len(_vapid_header_cache) >= VAPID_HEADER_CACHE_SIZE:
+        _vapid_header_cache.clear()
+    _vapid_header_cache[cache_key] = (now + VAPID_HEADER_CACHE_TTL, headers)
+    return headers
+
+
+def _encrypt_payload(subscription_info: Dict, data: bytes, private_key: str) -> Tuple[bytes, Dict[str, str]]:
+    """Encrypt a payload for one subscription and build the headers for its push request.
     
-    Args:
-        subscription_info: Dictionary containing endpoint and keys
-        payload: Notification payload (title, body, etc.)
-        vapid_private_key: Optional override for VAPID private key
-        
     Returns:
-        True if successful, False otherwise
+        Tuple of (encrypted body, request headers)
     """
+    encoded = WebPusher(subscription_info).encode(data, PUSH_CONTENT_ENCODING)
+    headers = dict(_get_vapid_headers(subscription_info["endpoint"], private_key))
+    headers["content-encoding"] = PUSH_CONTENT_ENCODING
+    headers["ttl"] = "0"
+    return encoded["body"], headers
+
+
+def _resolve_private_key(vapid_private_key: Optional[str] = None) -> Optional[str]:
+    """Return the VAPID private key to sign with, or None (logged) if keys are not configured."""
     # Reload keys if not available (in case they were generated after import)
     if not VAPID_PRIVATE_KEY:
-        _reload_vapid_keys()
+        _reload_missing_vapid_keys()
     
-    # Check if keys are configured
     key_to_use = vapid_private_key or VAPID_PRIVATE_KEY
     if not key_to_use:
         logger.error(
             "VAPID private key is not configured. Cannot send push notification. "
             "Ensure VAPID keys are set in environment variables or .env file."
         )
+    return key_to_use
+
+
+def _origin_semaphore(origin: str) -> asyncio.Semaphore:
+    """Return the semaphore bounding in-flight requests to one push service."""
+    semaphore = _origin_semaphores.get(origin)
+    if semaphore is None:
+        semaphore = _origin_semaphores[origin] = asyncio.Semaphore(PUSH_ORIGIN_CONCURRENCY)
+    return semaphore
+
+
+def _circuit_open(origin: str) -> bool:
+    """Check whether sends to a push service are suspended after repeated failures.
+    
+    Once the cooldown has passed, requests are let through again; the next
+    failure re-opens the circuit and a success closes it.
+    """
+    failures, opened_at = _origin_failures.get(origin, (0, 0.0))
+    if failures < CIRCUIT_FAILURE_THRESHOLD:
+        return False
+    return time.monotonic() - opened_at < CIRCUIT_COOLDOWN
+
+
+def _record_origin_result(origin: str, healthy: bool):
+    """Track consecutive failures of a push service for the circuit breaker."""
+    if healthy:
+        _origin_failures.pop(origin, None)
+        return
+    failures, opened_at = _origin_failures.get(origin, (0, 0.0))
+    failures += 1
+    if failures >= CIRCUIT_FAILURE_THRESHOLD:
+        opened_at = time.monotonic()
+    _origin_failures[origin] = (failures, opened_at)
+
+
+def _serialize_payload(payload: Dict) -> bytes:
+    """Serialize a notification payload, falling back to json for values orjson rejects."""
+    try:
+        return orjson.dumps(payload)
+    except orjson.JSONEncodeError:
+        # e.g. integers wider than 64 bits or non-string keys in the free-form data dict
+        return json.dumps(payload).encode()
+
+
+async def _send_push_data(subscription_info: Dict, data: bytes, private_key: str) -> bool:
+    """Deliver an already serialized payload to a subscription. Returns True if successful."""
+    try:
+        endpoint = subscription_info["endpoint"]
+        origin = urlparse(endpoint).netloc
+    except (KeyError, TypeError, ValueError) as e:
+        # Stored endpoints are not validated (e.g. "https://[bad" raises ValueError)
+        logger.error(f"Error sending push notification: invalid endpoint: {e}")
+        return False
+    if _circuit_open(origin):
+        logger.debug(f"Skipping push to {origin}: circuit open after repeated failures")
         return False
     
-    import asyncio
     try:
-        # pywebpush is synchronous, so we run it in executor to avoid blocking
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(
-            None,
-            lambda: webpush(
-                subscription_info=subscription_info,
-                data=json.dumps(payload),
-                vapid_private_key=key_to_use,
-                vapid_claims=VAPID_CLAIMS
-            )
+        # Encryption is CPU-bound, so we run it on the push pool to avoid blocking;
+        # the request itself goes out on the shared async client
+        body, headers = await asyncio.get_running_loop().run_in_executor(
+            _PUSH_POOL, _encrypt_payload, subscription_info, data, private_key
         )
-        return True
-    except WebPushException as e:
-        logger.error(f"WebPush exception: {e}")
+        async with _origin_semaphore(origin):
+            response = await _http_client.post(endpoint, content=body, headers=headers)
+    except httpx.TransportError as e:
+        _record_origin_result(origin, healthy=False)
+        logger.error(f"Error sending push notification: {e}")
         return False
     except Exception as e:
         logger.error(f"Error sending push notification: {e}")
         return False
+    
+    # 4xx responses concern the individual subscription (e.g. 410 expired), not the service
+    _record_origin_result(origin, healthy=response.status_code < 500)
+    if response.status_code > 202:
+        logger.error(
+            f"WebPush exception: Push failed: {response.status_code} {response.reason_phrase}\n"
+            f"Response body:{response.text}"
+        )
+        return False
+    return True
+
+
+async def send_push_notification(
+    subscription_info: Dict,
+    payload: Dict,
+    vapid_private_key: Optional[str] = None
+) -> bool:
+    """
+    Send a push notification to a subscription.
+    
+    Args:
+        subscription_info: Dictionary containing endpoint and keys
+        payload: Notification payload (title, body, etc.)
+        vapid_private_key: Optional override for VAPID private key
+        
+    Returns:
+        True if successful, False otherwise
+    """
+    key_to_use = _resolve_private_key(vapid_private_key)
+    if not key_to_use:
+        return False
+    
+    return await _send_push_data(subscription_info, _serialize_payload(payload), key_to_use)
 
+
+async def send_push_batch(
+    subscription_infos: List[Dict],
+    payload: Dict,
+    concurrency: int = PUSH_CONCURRENCY
+) -> List[bool]:
+    """
+    Send the same push notification to many subscriptions concurrently.
+    
+    Args:
+        subscription_infos: List of dictionaries containing endpoint and keys
+        payload: Notification payload (title, body, etc.)
+        concurrency: Maximum number of notifications sent at the same time
+        
+    Returns:
+        List of per-subscription results (True if sent), in input order
+    """
+    key_to_use = _resolve_private_key()
+    if not key_to_use:
+        return [False] * len(subscription_infos)
+    
+    # Serialize once; every subscription receives the same payload
+    data = _serialize_payload(payload)
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def _bounded_send(subscription_info: Dict) -> bool:
+        async with semaphore:
+            return await _send_push_data(subscription_info, data, key_to_use)
+    
+    results = await asyncio.gather(
+        *(_bounded_send(info) for info in subscription_infos),
+        return_exceptions=True
+    )
+    return [result is True for result in results]
+
+
+async def send_push_stream(
+    subscription_infos: AsyncIterator[Dict],
+    payload: Dict,
+    concurrency: int = PUSH_CONCURRENCY
+) -> Tuple[int, int]:
+    """
+    Send the same push notification to subscriptions as they are streamed in.
+    
+    Subscriptions are handed to a fixed pool of workers through a bounded queue,
+    so memory stays proportional to the concurrency instead of the audience size.
+    
+    Args:
+        subscription_infos: Async iterator of dictionaries containing endpoint and keys
+        payload: Notification payload (title, body, etc.)
+        concurrency: Number of workers sending notifications at the same time
+        
+    Returns:
+        Tuple of (success_count, failed_count)
+        
+    Raises:
+        RuntimeError: If no VAPID private key is configured (nothing is read from the stream)
+    """
+    key_to_use = _resolve_private_key()
+    if not key_to_use:
+        # Don't read through the whole audience just to count failures
+        raise RuntimeError("VAPID private key is not configured")
+    
+    # Serialize once; every subscription receives the same payload
+    data = _serialize_payload(payload)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    success_count = 0
+    failed_count = 0
+    
+    async def _worker():
+        nonlocal success_count, failed_count
+        while True:
+            subscription_info = await queue.get()
+            if subscription_info is None:
+                return
+            # One bad subscription must not stop the worker (and with it the stream)
+            try:
+                sent = await _send_push_data(subscription_info, data, key_to_use)
+            except Exception as e:
+                logger.error(f"Error sending push notification: {e}")
+                sent = False
+            if sent:
+                success_count += 1
+            else:
+                failed_count += 1
+    
+    workers = [asyncio.create_task(_worker()) for _ in range(concurrency)]
+    try:
+        async for subscription_info in subscription_infos:
+            await queue.put(subscription_info)
+        for _ in workers:
+            await queue.put(None)
+        await asyncio.gather(*workers)
+    except BaseException:
+        for worker in workers:
+            worker.cancel()
+        raise
+    
+    return success_count, failed_count
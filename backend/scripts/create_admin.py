@@ -46,6 +46,13 @@ if __name__ == "__main__":
         print("Error: Password must be at least 8 characters long.")
         sys.exit(1)
     
+    # Use uvloop when available (installed with uvicorn[standard]) for a faster event loop
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+    
     result = asyncio.run(create_admin(username, password))
     sys.exit(0 if result else 1)
 
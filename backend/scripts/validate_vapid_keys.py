@@ -12,6 +12,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from generate_vapid_keys import (
+    decode_vapid_key,
     get_vapid_keys_from_env,
     read_env_file,
     validate_vapid_keys
@@ -121,10 +122,9 @@ Examples:
             print("SUCCESS: VAPID keys are valid")
             if args.verbose:
                 # Decode and show key lengths
-                import base64
                 try:
-                    pub_bytes = base64.urlsafe_b64decode(public_key + '==')
-                    priv_bytes = base64.urlsafe_b64decode(private_key + '==')
+                    pub_bytes = decode_vapid_key(public_key)
+                    priv_bytes = decode_vapid_key(private_key)
                     print(f"Public key length: {len(pub_bytes)} bytes (expected: 64)")
                     print(f"Private key length: {len(priv_bytes)} bytes (expected: 32)")
                 except Exception as e:
@@ -1,5 +1,6 @@
 """MongoDB database connection setup using Motor and Beanie ODM."""
 import os
+from typing import Optional
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 from dotenv import load_dotenv
@@ -9,16 +10,48 @@ load_dotenv()
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://127.0.0.1:27017/user_registration_db")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "user_registration_db")
 
+# Wire compression for MongoDB traffic. zlib needs no extra packages; "zstd" or "snappy"
+# can be listed first when the zstandard / python-snappy packages are installed.
+MONGODB_COMPRESSORS = os.getenv("MONGODB_COMPRESSORS", "zlib")
+
+# Shared client, reused by Beanie and the health check
+_client: Optional[AsyncIOMotorClient] = None
+
+
+def get_client() -> AsyncIOMotorClient:
+    """Get the shared MongoDB client, creating it on first use."""
+    global _client
+    
+    if _client is None:
+        # Add connection timeout parameters
+        _client = AsyncIOMotorClient(
+            MONGODB_URI,
+            serverSelectionTimeoutMS=10000,  # 10 seconds
+            connectTimeoutMS=10000,
+            maxPoolSize=200,
+            minPoolSize=20,  # Keep connections warm for login/register bursts
+            compressors=MONGODB_COMPRESSORS,
+            retryWrites=True,
+            uuidRepresentation="standard"
+        )
+    return _client
+
+
+def close_client():
+    """Close the shared MongoDB client (called on application shutdown)."""
+    global _client
+    
+    if _client is not None:
+        _client.close()
+        _client = None
+
 
 async def init_database(document_models=None):
     """Initialize MongoDB connection and Beanie ODM."""
     if document_models is None:
         document_models = []
-    # Add connection timeout parameters
-    client = AsyncIOMotorClient(
-        MONGODB_URI,
-        serverSelectionTimeoutMS=10000,  # 10 seconds
-        connectTimeoutMS=10000
-    )
+    client = get_client()
+    # Establish the connection pool before the first request needs it
+    await client.admin.command("ping")
     await init_beanie(database=client[DATABASE_NAME], document_models=document_models)
 
@@ -1,11 +1,13 @@
 """Fingerprint management utilities."""
 import hashlib
-from typing import Optional, Dict
+from typing import Optional, Dict, Union
 
 
-def hash_fingerprint(fingerprint: str) -> str:
-    """Hash a fingerprint using SHA-256."""
-    return hashlib.sha256(fingerprint.encode()).hexdigest()
+def hash_fingerprint(fingerprint: Union[str, bytes]) -> str:
+    """Hash a fingerprint using SHA-256 (accepts already encoded bytes to skip the encode step)."""
+    data = fingerprint if isinstance(fingerprint, bytes) else fingerprint.encode()
+    # Identification hash, not a security primitive
+    return hashlib.sha256(data, usedforsecurity=False).hexdigest()
 
 
 def validate_fingerprint(fingerprint: str) -> bool:
@@ -15,17 +17,21 @@ def validate_fingerprint(fingerprint: str) -> bool:
     return True
 
 
+_UNKNOWN = "Unknown"
+
+
 def normalize_device_info(device_info: Optional[Dict]) -> Optional[Dict]:
     """Normalize device information."""
     if not device_info:
         return None
     
-    # Extract relevant information
-    normalized = {
-        "browser": device_info.get("browser", {}).get("name", "Unknown"),
-        "os": device_info.get("os", {}).get("name", "Unknown"),
-        "device": device_info.get("device", {}).get("type", "Unknown"),
+    # Extract relevant information without building throwaway {} defaults
+    browser = device_info.get("browser")
+    os_info = device_info.get("os")
+    device = device_info.get("device")
+    return {
+        "browser": browser.get("name", _UNKNOWN) if browser else _UNKNOWN,
+        "os": os_info.get("name", _UNKNOWN) if os_info else _UNKNOWN,
+        "device": device.get("type", _UNKNOWN) if device else _UNKNOWN,
     }
-    
-    return normalized
 
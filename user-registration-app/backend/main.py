@@ -1,21 +1,27 @@
 """FastAPI application for User Registration with Push Integration."""
+import asyncio
 import logging
-from fastapi import FastAPI, HTTPException, Depends, APIRouter
+import time
+import orjson
+from fastapi import FastAPI, HTTPException, Depends, APIRouter, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel, EmailStr
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 from datetime import datetime
+from beanie import PydanticObjectId
+from pymongo.errors import DuplicateKeyError
 
-from database import init_database
-from models import User, UserFingerprint, UserPushSubscription
-from auth import verify_password, get_password_hash, create_access_token, get_current_user
+from database import init_database, get_client, close_client as close_database_client
+from models import User, UserFingerprint, UserPushSubscription, UserLoginView
+from auth import verify_and_update_password, get_password_hash, create_access_token, get_current_user
 from fingerprint import hash_fingerprint, validate_fingerprint, normalize_device_info
 from push_integration import (
     get_or_create_application,
     subscribe_user_to_push,
     send_push_to_user,
-    send_push_broadcast
+    send_push_broadcast,
+    close_client
 )
 
 logger = logging.getLogger(__name__)
@@ -27,7 +33,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
-    openapi_url="/api/openapi.json"
+    openapi_url="/api/openapi.json",
+    default_response_class=ORJSONResponse
 )
 
 # Create API router with /api prefix
@@ -113,36 +120,57 @@ async def startup_event():
         logger.warning("Push service integration will be available after service is ready")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled connections to the Push service and MongoDB."""
+    await close_client()
+    close_database_client()
+
+
+# Static response bodies, rendered once
+_ROOT_BODY = orjson.dumps({"message": "User Registration Service API"})
+
+# Liveness probes may hit /health every second; reuse the last ping outcome for a few seconds
+HEALTH_CACHE_TTL = 5.0
+_health_cache: Tuple[float, bytes] = (0.0, b"")
+
+
 @api_router.get("/")
 async def root():
     """Root endpoint."""
-    return {"message": "User Registration Service API"}
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 
 @api_router.get("/health")
 async def health_check():
     """Health check endpoint."""
+    global _health_cache
+    
+    checked_at, body = _health_cache
+    now = time.monotonic()
+    if now - checked_at < HEALTH_CACHE_TTL:
+        return Response(content=body, media_type="application/json")
+    
     try:
-        # Check database connection
-        from motor.motor_asyncio import AsyncIOMotorClient
-        from database import MONGODB_URI
-        client = AsyncIOMotorClient(MONGODB_URI)
-        await client.admin.command('ping')
-        client.close()
+        # Check database connection on the shared client
+        await get_client().admin.command('ping')
         
-        return {
+        body = orjson.dumps({
             "status": "healthy",
             "database": "connected"
-        }
+        })
     except Exception as e:
         logger.error(f"Health check failed: {e}")
-        return {
+        body = orjson.dumps({
             "status": "unhealthy",
             "error": str(e)
-        }
+        })
+    
+    _health_cache = (now, body)
+    return Response(content=body, media_type="application/json")
 
 
-@api_router.post("/register", response_model=UserResponse)
+@api_router.post("/register", responses={200: {"model": UserResponse}})
 async def register(user_data: UserRegister):
     """Register a new user with fingerprint."""
     try:
@@ -150,50 +178,56 @@ async def register(user_data: UserRegister):
         if not validate_fingerprint(user_data.fingerprint):
             raise HTTPException(status_code=400, detail="Invalid fingerprint format")
         
-        # Check if username already exists
-        existing_user = await User.find_one({"username": user_data.username})
-        if existing_user:
-            raise HTTPException(status_code=400, detail="Username already exists")
-        
-        # Check if email already exists
-        existing_email = await User.find_one({"email": user_data.email})
-        if existing_email:
-            raise HTTPException(status_code=400, detail="Email already exists")
-        
-        # Hash password
-        password_hash = get_password_hash(user_data.password)
+        # Hash password (Argon2 is CPU-bound, so keep it off the event loop)
+        password_hash = await asyncio.to_thread(get_password_hash, user_data.password)
         
         # Hash fingerprint
         fingerprint_hash = hash_fingerprint(user_data.fingerprint)
         
-        # Create user
+        # Create user with its id assigned up front so the fingerprint can reference it
         user = User(
+            id=PydanticObjectId(),
             username=user_data.username,
             email=user_data.email,
-            password_hash=password_hash,
-            created_at=datetime.utcnow()
+            password_hash=password_hash
         )
-        await user.insert()
-        
-        # Save fingerprint
         device_info = normalize_device_info(user_data.device_info)
         user_fingerprint = UserFingerprint(
             user_id=str(user.id),
             fingerprint_hash=fingerprint_hash,
-            device_info=device_info,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
+            device_info=device_info
+        )
+        
+        # Both writes are independent, so run them concurrently
+        user_result, fingerprint_result = await asyncio.gather(
+            user.insert(),
+            user_fingerprint.insert(),
+            return_exceptions=True
         )
-        await user_fingerprint.insert()
+        if isinstance(user_result, BaseException):
+            # Don't leave a fingerprint behind for a user that was never created
+            if not isinstance(fingerprint_result, BaseException):
+                await user_fingerprint.delete()
+            # Uniqueness of username and email is enforced by unique indexes
+            if isinstance(user_result, DuplicateKeyError):
+                key_pattern = (user_result.details or {}).get("keyPattern", {})
+                if "email" in key_pattern:
+                    raise HTTPException(status_code=400, detail="Email already exists")
+                raise HTTPException(status_code=400, detail="Username already exists")
+            raise user_result
+        if isinstance(fingerprint_result, BaseException):
+            raise fingerprint_result
         
         logger.info(f"User registered: {user.username} ({user.email})")
         
-        return UserResponse(
+        # Fields come from the already-validated document: skip model validation and
+        # return the serialized model directly so FastAPI doesn't validate it either
+        return ORJSONResponse(UserResponse.model_construct(
             id=str(user.id),
             username=user.username,
             email=user.email,
             created_at=user.created_at
-        )
+        ).model_dump())
         
     except HTTPException:
         raise
@@ -202,14 +236,18 @@ async def register(user_data: UserRegister):
         raise HTTPException(status_code=500, detail=f"Error during registration: {str(e)}")
 
 
-@api_router.post("/login", response_model=LoginResponse)
+@api_router.post("/login", responses={200: {"model": LoginResponse}})
 async def login(login_data: UserLogin):
     """User login endpoint."""
     try:
-        # Find user by username or email
-        user = await User.find_one({"username": login_data.username})
-        if not user:
-            user = await User.find_one({"email": login_data.username})
+        # Find user by username or email in one query (a username match takes precedence),
+        # fetching only the fields login needs
+        candidates = await User.find(
+            {"$or": [{"username": login_data.username}, {"email": login_data.username}]}
+        ).limit(2).project(UserLoginView).to_list()
+        user = next((c for c in candidates if c.username == login_data.username), None)
+        if not user and candidates:
+            user = candidates[0]
         
         if not user:
             raise HTTPException(
@@ -217,23 +255,30 @@ async def login(login_data: UserLogin):
                 detail="Incorrect username/email or password"
             )
         
-        # Verify password
-        if not verify_password(login_data.password, user.password_hash):
+        # Verify password (hashing is CPU-bound, so keep it off the event loop)
+        valid, new_hash = await asyncio.to_thread(
+            verify_and_update_password, login_data.password, user.password_hash
+        )
+        if not valid:
             raise HTTPException(
                 status_code=401,
                 detail="Incorrect username/email or password"
             )
         
+        # Upgrade legacy bcrypt hashes to Argon2id now that we have the plaintext
+        if new_hash:
+            await User.find_one({"_id": user.id}).update({"$set": {"password_hash": new_hash}})
+        
         # Create access token
         access_token = create_access_token(data={"sub": str(user.id)})
         
-        return LoginResponse(
+        return ORJSONResponse(LoginResponse.model_construct(
             access_token=access_token,
             token_type="bearer",
             user_id=str(user.id),
             username=user.username,
             email=user.email
-        )
+        ).model_dump())
         
     except HTTPException:
         raise
@@ -242,15 +287,15 @@ async def login(login_data: UserLogin):
         raise HTTPException(status_code=500, detail=f"Error during login: {str(e)}")
 
 
-@api_router.get("/user/me", response_model=UserResponse)
+@api_router.get("/user/me", responses={200: {"model": UserResponse}})
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     """Get current user information."""
-    return UserResponse(
+    return ORJSONResponse(UserResponse.model_construct(
         id=str(current_user.id),
         username=current_user.username,
         email=current_user.email,
         created_at=current_user.created_at
-    )
+    ).model_dump())
 
 
 @api_router.post("/user/fingerprint")
@@ -267,26 +312,22 @@ async def update_fingerprint(
         # Hash fingerprint
         fingerprint_hash = hash_fingerprint(fingerprint_data.fingerprint)
         
-        # Find existing fingerprint
-        user_fingerprint = await UserFingerprint.find_one({"user_id": str(current_user.id)})
+        device_info = normalize_device_info(fingerprint_data.device_info)
         
-        if user_fingerprint:
-            # Update existing
-            user_fingerprint.fingerprint_hash = fingerprint_hash
-            user_fingerprint.device_info = normalize_device_info(fingerprint_data.device_info)
-            user_fingerprint.updated_at = datetime.utcnow()
-            await user_fingerprint.save()
-        else:
-            # Create new
-            device_info = normalize_device_info(fingerprint_data.device_info)
-            user_fingerprint = UserFingerprint(
-                user_id=str(current_user.id),
-                fingerprint_hash=fingerprint_hash,
-                device_info=device_info,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-            await user_fingerprint.insert()
+        # Update or create the fingerprint in a single upsert, timestamped by the server
+        # (user_id is copied from the filter when a new document is inserted)
+        filter_query = {"user_id": str(current_user.id)}
+        update_query = {
+            "$set": {"fingerprint_hash": fingerprint_hash, "device_info": device_info},
+            "$currentDate": {"updated_at": True},
+            "$setOnInsert": {"created_at": datetime.utcnow()}
+        }
+        collection = UserFingerprint.get_motor_collection()
+        try:
+            await collection.update_one(filter_query, update_query, upsert=True)
+        except DuplicateKeyError:
+            # A concurrent request inserted it first (user_id is unique); update that one
+            await collection.update_one(filter_query, update_query)
         
         return {"success": True, "message": "Fingerprint updated"}
         
@@ -335,8 +376,7 @@ async def subscribe_to_push(
                         user_id=str(current_user.id),
                         push_subscription_id=subscription_id,
                         application_id=application_id,
-                        endpoint=subscription_data.endpoint,
-                        created_at=datetime.utcnow()
+                        endpoint=subscription_data.endpoint
                     )
                     await user_push_link.insert()
         
@@ -400,5 +440,7 @@ app.include_router(api_router)
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop/httptools come with uvicorn[standard]; the worker count is taken from
+    # WEB_CONCURRENCY by uvicorn itself (multiple workers need the app as an import string)
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
 
@@ -1,8 +1,9 @@
 """Database models for user registration and fingerprint storage."""
 from datetime import datetime
 from typing import Optional
-from beanie import Document
-from pydantic import Field, EmailStr
+from beanie import Document, PydanticObjectId
+from pydantic import BaseModel, Field, EmailStr
+from pymongo import IndexModel
 
 
 class User(Document):
@@ -10,12 +11,25 @@ class User(Document):
     
     username: str = Field(..., unique=True)
     email: EmailStr = Field(..., unique=True)
-    password_hash: str  # Hashed password using bcrypt
-    created_at: datetime = datetime.utcnow()
+    password_hash: str  # Hashed password (Argon2id; older accounts may still have bcrypt)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
     
     class Settings:
         name = "users"
-        indexes = ["username", "email"]
+        # Unique indexes enforce uniqueness atomically on insert (DuplicateKeyError)
+        indexes = [
+            IndexModel("username", unique=True),
+            IndexModel("email", unique=True),
+        ]
+
+
+class UserLoginView(BaseModel):
+    """Projection of User with only the fields login needs."""
+    
+    id: PydanticObjectId = Field(alias="_id")
+    username: str
+    email: str
+    password_hash: str
 
 
 class UserFingerprint(Document):
@@ -24,12 +38,16 @@ class UserFingerprint(Document):
     user_id: str = Field(..., index=True)  # Reference to User.id
     fingerprint_hash: str = Field(..., index=True)  # Hashed fingerprint
     device_info: Optional[dict] = None  # Device information (browser, OS, etc.)
-    created_at: datetime = datetime.utcnow()
-    updated_at: datetime = datetime.utcnow()
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
     
     class Settings:
         name = "user_fingerprints"
-        indexes = ["user_id", "fingerprint_hash"]
+        # One fingerprint per user, so concurrent upserts cannot create duplicates
+        indexes = [
+            IndexModel("user_id", unique=True),
+            "fingerprint_hash",
+        ]
 
 
 class UserPushSubscription(Document):
@@ -39,7 +57,7 @@ class UserPushSubscription(Document):
     push_subscription_id: str  # Reference to PushSubscription.id in Push service
     application_id: str  # Application ID in Push service
     endpoint: str  # Push subscription endpoint
-    created_at: datetime = datetime.utcnow()
+    created_at: datetime = Field(default_factory=datetime.utcnow)
     
     class Settings:
         name = "user_push_subscriptions"
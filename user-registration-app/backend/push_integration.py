@@ -1,9 +1,10 @@
 """Integration with Push service for managing subscriptions and sending notifications."""
 import os
 import asyncio
+import time
 import httpx
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -14,20 +15,62 @@ PUSH_ADMIN_USERNAME = os.getenv("PUSH_ADMIN_USERNAME", "admin")
 PUSH_ADMIN_PASSWORD = os.getenv("PUSH_ADMIN_PASSWORD", "admin")
 PUSH_APPLICATION_NAME = os.getenv("PUSH_APPLICATION_NAME", "User Registration App")
 
+# Push service admin tokens are valid for 24 hours; refresh well before that
+PUSH_ADMIN_TOKEN_TTL = int(os.getenv("PUSH_ADMIN_TOKEN_TTL", 12 * 60 * 60))
+
 # Cache for application_id and admin token
 _application_id_cache: Optional[str] = None
 _admin_token_cache: Optional[str] = None
+_admin_token_expires_at: float = 0.0
+
+# Single-flight locks so concurrent cold calls share one upstream round trip
+_app_lock = asyncio.Lock()
+_token_lock = asyncio.Lock()
+
+# Shared HTTP client so calls to the Push service reuse keep-alive connections
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client for the Push service, creating it on first use."""
+    global _client
+    
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=10.0,
+            limits=httpx.Limits(max_keepalive_connections=50, max_connections=100)
+        )
+    return _client
+
+
+async def close_client():
+    """Close the shared HTTP client (called on application shutdown)."""
+    global _client
+    
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def _admin_token_fresh() -> bool:
+    """Whether the cached admin token exists and is not within a minute of expiring."""
+    return bool(_admin_token_cache) and time.monotonic() < _admin_token_expires_at - 60
 
 
 async def get_admin_token() -> str:
     """Get admin authentication token from Push service."""
-    global _admin_token_cache
+    global _admin_token_cache, _admin_token_expires_at
     
-    if _admin_token_cache:
+    if _admin_token_fresh():
         return _admin_token_cache
     
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with _token_lock:
+            # Another request may have refreshed the token while we waited
+            if _admin_token_fresh():
+                return _admin_token_cache
+            
+            client = get_client()
             response = await client.post(
                 f"{PUSH_SERVICE_API_BASE}/admin/login",
                 json={
@@ -37,10 +80,12 @@ async def get_admin_token() -> str:
             )
             response.raise_for_status()
             data = response.json()
-            _admin_token_cache = data.get("access_token")
-            if not _admin_token_cache:
+            token = data.get("access_token")
+            if not token:
                 raise Exception("No access token in response")
-            return _admin_token_cache
+            _admin_token_cache = token
+            _admin_token_expires_at = time.monotonic() + PUSH_ADMIN_TOKEN_TTL
+            return token
     except Exception as e:
         logger.error(f"Failed to get admin token: {e}")
         raise Exception(f"Failed to authenticate with Push service: {str(e)}")
@@ -54,9 +99,16 @@ async def get_or_create_application() -> str:
         return _application_id_cache
     
     try:
-        token = await get_admin_token()
-        
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with _app_lock:
+            # Another request may have resolved the application while we waited;
+            # this also keeps concurrent callers from creating it twice
+            if _application_id_cache:
+                return _application_id_cache
+            
+            token = await get_admin_token()
+            
+            client = get_client()
+            
             # First, try to get existing application
             response = await client.get(
                 f"{PUSH_SERVICE_API_BASE}/admin/applications",
@@ -84,12 +136,20 @@ async def get_or_create_application() -> str:
             _application_id_cache = app_data.get("id")
             logger.info(f"Created application: {_application_id_cache}")
             return _application_id_cache
-            
+        
     except Exception as e:
         logger.error(f"Failed to get or create application: {e}")
         raise Exception(f"Failed to get or create application in Push service: {str(e)}")
 
 
+async def _get_application_and_token(application_id: Optional[str] = None) -> Tuple[str, str]:
+    """Resolve the application ID (unless given) and the admin token concurrently."""
+    if application_id:
+        return application_id, await get_admin_token()
+    application_id, token = await asyncio.gather(get_or_create_application(), get_admin_token())
+    return application_id, token
+
+
 async def subscribe_user_to_push(
     user_id: str,
     subscription_data: Dict[str, Any],
@@ -107,25 +167,21 @@ async def subscribe_user_to_push(
             "user_id": user_id
         }
         
-        # Subscribe to Push service
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                f"{PUSH_SERVICE_API_BASE}/subscribe",
-                json=push_subscription
-            )
-            response.raise_for_status()
-            result = response.json()
+        # Subscribe to Push service, fetching the admin token (needed for assignment) concurrently
+        client = get_client()
+        response, token = await asyncio.gather(
+            client.post(f"{PUSH_SERVICE_API_BASE}/subscribe", json=push_subscription),
+            get_admin_token()
+        )
+        response.raise_for_status()
+        result = response.json()
         
         # Assign subscription to application
         if result.get("success"):
-            # Get the subscription from Push service to get its ID
-            # We need to find it by user_id
-            token = await get_admin_token()
-            async with httpx.AsyncClient(timeout=10.0) as client:
-            # Get user subscriptions - wait a bit for subscription to be saved
-            await asyncio.sleep(0.5)
-                
-                # Get user subscriptions
+            # The Push service returns the subscription ID; older versions do not,
+            # in which case we find it by user_id and endpoint
+            subscription_id = result.get("subscription_id")
+            if not subscription_id:
                 response = await client.get(
                     f"{PUSH_SERVICE_API_BASE}/admin/users",
                     headers={"Authorization": f"Bearer {token}"},
@@ -135,37 +191,35 @@ async def subscribe_user_to_push(
                 users_data = response.json()
                 
                 # Find subscription by endpoint
-                subscription_id = None
-                if users_data.get("users"):
-                    for user_sub in users_data["users"]:
-                        if user_sub.get("endpoint") == subscription_data["endpoint"]:
-                            subscription_id = user_sub["id"]
-                            break
+                for user_sub in users_data.get("users") or []:
+                    if user_sub.get("endpoint") == subscription_data["endpoint"]:
+                        subscription_id = user_sub["id"]
+                        break
+            
+            if subscription_id:
+                # Assign to application
+                assign_response = await client.put(
+                    f"{PUSH_SERVICE_API_BASE}/admin/users/{subscription_id}/assign",
+                    headers={"Authorization": f"Bearer {token}"},
+                    json={"application_id": application_id}
+                )
+                assign_response.raise_for_status()
                 
-                if subscription_id:
-                    # Assign to application
-                    assign_response = await client.put(
-                        f"{PUSH_SERVICE_API_BASE}/admin/users/{subscription_id}/assign",
-                        headers={"Authorization": f"Bearer {token}"},
-                        json={"application_id": application_id}
-                    )
-                    assign_response.raise_for_status()
-                    
-                    return {
-                        "success": True,
-                        "subscription_id": subscription_id,
-                        "application_id": application_id
-                    }
-                else:
-                    # Subscription created but couldn't find it for assignment
-                    # This is okay, it will be assigned later if needed
-                    logger.warning(f"Subscription created but couldn't find it for assignment (user_id: {user_id})")
-                    return {
-                        "success": True,
-                        "subscription_id": None,
-                        "application_id": application_id,
-                        "message": "Subscription created but assignment may need to be done manually"
-                    }
+                return {
+                    "success": True,
+                    "subscription_id": subscription_id,
+                    "application_id": application_id
+                }
+            else:
+                # Subscription created but couldn't find it for assignment
+                # This is okay, it will be assigned later if needed
+                logger.warning(f"Subscription created but couldn't find it for assignment (user_id: {user_id})")
+                return {
+                    "success": True,
+                    "subscription_id": None,
+                    "application_id": application_id,
+                    "message": "Subscription created but assignment may need to be done manually"
+                }
         
         return result
         
@@ -181,22 +235,18 @@ async def send_push_to_user(
 ) -> Dict[str, Any]:
     """Send push notification to a specific user via Push service."""
     try:
-        if not application_id:
-            application_id = await get_or_create_application()
+        application_id, token = await _get_application_and_token(application_id)
         
-        token = await get_admin_token()
-        
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                f"{PUSH_SERVICE_API_BASE}/push/single/{user_id}",
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json"
-                },
-                json=payload
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await get_client().post(
+            f"{PUSH_SERVICE_API_BASE}/push/single/{user_id}",
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json"
+            },
+            json=payload
+        )
+        response.raise_for_status()
+        return response.json()
             
     except Exception as e:
         logger.error(f"Failed to send push to user: {e}")
@@ -209,22 +259,18 @@ async def send_push_broadcast(
 ) -> Dict[str, Any]:
     """Send push notification to all users of this application."""
     try:
-        if not application_id:
-            application_id = await get_or_create_application()
-        
-        token = await get_admin_token()
+        application_id, token = await _get_application_and_token(application_id)
         
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.post(
-                f"{PUSH_SERVICE_API_BASE}/admin/push/application/{application_id}",
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json"
-                },
-                json=payload
-            )
-            response.raise_for_status()
-            return response.json()
+        response = await get_client().post(
+            f"{PUSH_SERVICE_API_BASE}/admin/push/application/{application_id}",
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json"
+            },
+            json=payload
+        )
+        response.raise_for_status()
+        return response.json()
             
     except Exception as e:
         logger.error(f"Failed to send broadcast push: {e}")
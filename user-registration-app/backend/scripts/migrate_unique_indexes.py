@@ -0,0 +1,101 @@
+"""One-off migration: rebuild single-field indexes that the models now declare as unique.
+
+Run this once before starting a version of the app whose models declare these indexes as
+unique; MongoDB will not turn an existing non-unique index into a unique one in place.
+Duplicate users are reported and nothing is changed until they have been resolved.
+Duplicate fingerprints are derived data and are removed, keeping the most recently updated.
+"""
+import asyncio
+import sys
+import os
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import get_client, close_client, DATABASE_NAME
+
+# (collection, field, dedupe) entries whose single-field index must be unique.
+# With dedupe, duplicates are deleted (newest updated_at wins) instead of reported.
+UNIQUE_INDEXES = [
+    ("users", "username", False),
+    ("users", "email", False),
+    ("user_fingerprints", "user_id", True),
+]
+
+
+async def find_duplicates(collection, field: str) -> list:
+    """Return groups of documents sharing the same value for field, newest first within a group."""
+    pipeline = [
+        {"$sort": {"updated_at": -1}},
+        {"$group": {"_id": f"${field}", "count": {"$sum": 1}, "ids": {"$push": "$_id"}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ]
+    return await collection.aggregate(pipeline, allowDiskUse=True).to_list(None)
+
+
+async def remove_duplicates(collection, groups: list) -> int:
+    """Delete all but the first document of each duplicate group."""
+    extra_ids = [doc_id for group in groups for doc_id in group["ids"][1:]]
+    if not extra_ids:
+        return 0
+    result = await collection.delete_many({"_id": {"$in": extra_ids}})
+    return result.deleted_count
+
+
+async def make_index_unique(collection, field: str) -> None:
+    """Swap the non-unique index on field for a unique one, restoring it if the build fails."""
+    name = f"{field}_1"
+    existing = (await collection.index_information()).get(name)
+    if existing and existing.get("unique"):
+        print(f"{collection.name}.{name} is already unique.")
+        return
+    
+    if existing:
+        await collection.drop_index(name)
+    try:
+        await collection.create_index(field, unique=True)
+    except Exception:
+        # A duplicate may have been written since the check; put the old index back
+        if existing:
+            await collection.create_index(field)
+        raise
+    print(f"{collection.name}.{name} rebuilt as unique.")
+
+
+async def migrate() -> bool:
+    """Check for duplicates and, if there are none, rebuild the indexes as unique."""
+    database = get_client()[DATABASE_NAME]
+    
+    duplicates_found = False
+    for collection_name, field, dedupe in UNIQUE_INDEXES:
+        if dedupe:
+            continue
+        for group in await find_duplicates(database[collection_name], field):
+            duplicates_found = True
+            ids = ", ".join(str(doc_id) for doc_id in group["ids"])
+            print(f"Duplicate {collection_name}.{field} {group['_id']!r} in {group['count']} documents: {ids}")
+    
+    if duplicates_found:
+        print("Resolve the duplicates above and run the migration again. No indexes were changed.")
+        return False
+    
+    for collection_name, field, dedupe in UNIQUE_INDEXES:
+        collection = database[collection_name]
+        if dedupe:
+            removed = await remove_duplicates(collection, await find_duplicates(collection, field))
+            if removed:
+                print(f"Removed {removed} duplicate document(s) from {collection_name} by {field}.")
+        await make_index_unique(collection, field)
+    return True
+
+
+async def main() -> bool:
+    try:
+        return await migrate()
+    finally:
+        close_client()
+
+
+if __name__ == "__main__":
+    result = asyncio.run(main())
+    sys.exit(0 if result else 1)